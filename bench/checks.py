@@ -0,0 +1,167 @@
+"""Focused offline checks of the pipeline generator and profile resolution.
+
+  python bench/checks.py
+"""
+import io
+import os
+import sys
+import pathlib
+import tempfile
+import contextlib
+import xml.etree.ElementTree as ET
+from termcolor import colored
+
+bench_dir = pathlib.Path(__file__).parent.resolve()
+sys.path.insert(0, str(bench_dir.parent))
+
+import jks
+
+class RecordingServer:
+  """Jenkins stand-in keeping the config.xml given to create_job."""
+
+  def create_job(self, name, config_xml):
+    self.name = name
+    self.config_xml = config_xml
+
+def exits(func, *args):
+  with contextlib.redirect_stdout(io.StringIO()):
+    try:
+      func(*args)
+    except SystemExit as e:
+      return e.code
+  return None
+
+def render_script(stages):
+  server = RecordingServer()
+  with contextlib.redirect_stdout(io.StringIO()):
+    jks.create_pipeline(server, 'cron.check', '0 2 * * *', '', stages)
+  return ET.fromstring(server.config_xml).find('definition/script').text
+
+def get_phases(stages):
+  return [[tree['name'] for tree in level] for level in jks.get_stage_levels(jks.get_stage_trees(stages))]
+
+def check_one_deploy_and_start_per_env():
+  assert exits(jks.get_pipeline_stages, ['a', 'b'], [('a', 'e1'), ('b', 'e1')], []) == 1
+  assert exits(jks.get_pipeline_stages, [], [], [('a', 'e1'), ('b', 'e1')]) == 1
+
+def check_independent_branches_share_one_phase():
+  stages = jks.get_pipeline_stages(['a', 'b', 'c'], [('a', 'e1'), ('b', 'e2')], [])
+  assert get_phases(stages) == [['Build a > Deploy a on e1', 'Build b > Deploy b on e2', 'Build c']]
+
+def check_fork_stays_in_its_branch():
+  # The deploys of a must not wait for the chain of b
+  stages = jks.get_pipeline_stages(['a', 'b'], [('a', 'e1'), ('a', 'e2'), ('b', 'e3')], [('a', 'e1')])
+  assert get_phases(stages) == [['Build a > (Deploy a on e1 > Start a on e1 | Deploy a on e2)', 'Build b > Deploy b on e3']]
+
+  script = render_script(stages)
+  assert script.count('{') == script.count('}')
+  assert script.count('parallel {') == 1 and script.count('parallel(') == 1
+
+def check_fan_in_starts_a_phase():
+  stages = [
+    jks.make_stage('build', 'a'),
+    jks.make_stage('build', 'b'),
+    jks.make_stage('start', 'a', 'e1', after=['Build a', 'Build b']),
+  ]
+  assert get_phases(stages) == [['Build a', 'Build b'], ['Start a on e1']]
+
+def check_names_are_escaped():
+  stages = jks.get_pipeline_stages(["it's&<b>"], [("it's&<b>", "d'1")], [])
+  script = render_script(stages)
+  assert "stage('Build it\\'s&<b>')" in script
+  assert "value: 'd\\'1'" in script
+  assert "Product/Build/it%27s%26%3Cb%3E" in script
+
+def check_empty_branch_is_rejected():
+  assert exits(jks.get_branch_env, ':dev1') == 1
+  assert exits(jks.get_branch_env, 'master:dev1') == 1
+
+profiles_config = """
+[JENKINS]
+ServerUrl = https://jenkins.example
+Username = user
+ApiKey = ab%%cd
+
+[JENKINS:staging]
+ServerUrl = https://jenkins.staging.example
+Username = user
+ApiKey = st%%ag
+
+[GITLAB]
+ServerUrl = https://gitlab.example
+ApiKey = token
+
+[GITLAB:other]
+ServerUrl = https://gitlab.other.example
+ApiKey = other
+
+[SLACK]
+UserId = U1
+"""
+
+def read_config(content):
+  with tempfile.NamedTemporaryFile('w', suffix='.jks-env', delete=False) as file:
+    file.write(content)
+  try:
+    return jks.read_config_file(file.name)
+  finally:
+    os.unlink(file.name)
+
+def check_percent_escapes_resolved_once():
+  config = read_config(profiles_config)
+  assert jks.resolve_profiles(config, 'default')['default']['JENKINS']['ApiKey'] == 'ab%cd'
+  assert jks.resolve_profiles(config, 'staging')['staging']['JENKINS']['ApiKey'] == 'st%ag'
+
+def check_profile_overrides_and_falls_back():
+  staging = jks.resolve_profiles(read_config(profiles_config), 'staging')['staging']
+  assert staging['JENKINS']['ServerUrl'] == 'https://jenkins.staging.example'
+  assert staging['GITLAB']['ServerUrl'] == 'https://gitlab.example'
+
+def check_profile_from_environment():
+  os.environ['JKS_PROFILE'] = 'staging'
+  try:
+    assert list(jks.resolve_profiles(read_config(profiles_config))) == ['staging']
+    assert list(jks.resolve_profiles(read_config(profiles_config), 'default')) == ['default']
+  finally:
+    del os.environ['JKS_PROFILE']
+
+def check_unknown_profile_is_rejected():
+  assert exits(jks.resolve_profiles, read_config(profiles_config), 'nope') == 1
+
+def check_several_profiles_only_for_fan_out():
+  config = read_config(profiles_config)
+  assert exits(jks.resolve_profiles, config, 'default,staging') == 1
+  with contextlib.redirect_stdout(io.StringIO()):
+    assert list(jks.resolve_profiles(config, 'default,staging', fan_out=True)) == ['default', 'staging']
+
+def check_fan_out_dedupes_same_jenkins():
+  # "other" only overrides GITLAB, so it targets the default jenkins
+  with contextlib.redirect_stdout(io.StringIO()):
+    assert list(jks.resolve_profiles(read_config(profiles_config), 'default,other,staging', fan_out=True)) == ['default', 'staging']
+
+gitlab_only_config = """
+[GITLAB]
+ServerUrl = https://gitlab.example
+ApiKey = token
+"""
+
+def check_missing_jenkins_section_allowed():
+  config = read_config(gitlab_only_config)
+  assert jks.resolve_profiles(config)['default']['GITLAB']['ServerUrl'] == 'https://gitlab.example'
+  with contextlib.redirect_stdout(io.StringIO()):
+    assert list(jks.resolve_profiles(config, 'default', fan_out=True)) == ['default']
+
+if __name__ == "__main__":
+  checks = [value for name, value in list(globals().items()) if name.startswith('check_')]
+  failed = 0
+  for check in checks:
+    try:
+      check()
+      print(f"{colored('[Success]', 'green')} {check.__name__}")
+    except AssertionError:
+      failed += 1
+      print(f"{colored('[Error]', 'red')} {check.__name__}")
+    except Exception as e:
+      failed += 1
+      print(f"{colored('[Error]', 'red')} {check.__name__}: {type(e).__name__} {e}")
+  sys.exit(1 if failed else 0)
@@ -0,0 +1,374 @@
+"""Offline stand-in for the Jenkins and GitLab endpoints used by jks.py.
+
+Only the routes the tool actually touches are emulated:
+
+  Jenkins: whoami, crumb, job info, build / buildWithParameters,
+           queue item, build info and createItem
+  GitLab:  current user and merge requests list
+
+Latency, payload size and failure injection are configurable so the
+benchmark suite can measure how the tool behaves against a slow or flaky
+server without reaching the real infrastructure.
+"""
+import re
+import json
+import time
+import random
+import argparse
+import threading
+from urllib.parse import urlsplit, parse_qs, unquote
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Routes
+job_route = re.compile(r'^/((?:job/[^/]+/)+)(api/json|build|buildWithParameters|(\d+)/api/json)$')
+create_item_route = re.compile(r'^/((?:job/[^/]+/)*)createItem$')
+queue_item_route = re.compile(r'^/queue/item/(\d+)/api/json$')
+
+def job_name_from_path(folder_path):
+  # "job/Product/job/Build/job/story%252F1/" -> "Product/Build/story%2F1"
+  return '/'.join(unquote(segment) for segment in folder_path.strip('/').split('/')[1::2])
+
+class FakeState:
+  """Jobs, queue and counters shared by every request handler."""
+
+  def __init__(self, latency=0.0, jitter=0.0, payload_size=10, failure_rate=0.0, queue_polls=1, build_polls=1, seed=0, jobs=()):
+    self.latency = latency
+    self.jitter = jitter
+    self.payload_size = payload_size
+    self.failure_rate = failure_rate
+    self.queue_polls = queue_polls
+    self.build_polls = build_polls
+    self.random = random.Random(seed)
+    self.lock = threading.Lock()
+    self.jobs = {}
+    self.queue = {}
+    self.builds = {}
+    self.next_queue_id = 1
+    for name in jobs:
+      self.add_job(name)
+    self.reset_stats()
+
+  def reset_stats(self):
+    with self.lock:
+      self.stats = {
+        'requests': 0,
+        'connections': 0,
+        'bytes_received': 0,
+        'bytes_sent': 0,
+        'failures': 0,
+        'endpoints': {},
+      }
+
+  def snapshot_stats(self):
+    with self.lock:
+      return json.loads(json.dumps(self.stats))
+
+  def add_job(self, name, config_xml=''):
+    with self.lock:
+      self.jobs.setdefault(name, {'last_build': 1, 'config': config_xml})
+
+  def should_fail(self):
+    return self.failure_rate > 0 and self.random.random() < self.failure_rate
+
+  def wait(self):
+    delay = self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0)
+    if delay > 0:
+      time.sleep(delay)
+
+class CountingFile:
+  """Wrap the handler rfile/wfile to count the raw bytes, status lines and headers included."""
+
+  def __init__(self, file, state, key):
+    self.file = file
+    self.state = state
+    self.key = key
+
+  def count(self, size):
+    with self.state.lock:
+      self.state.stats[self.key] += size
+
+  def read(self, *args):
+    data = self.file.read(*args)
+    self.count(len(data))
+    return data
+
+  def readline(self, *args):
+    data = self.file.readline(*args)
+    self.count(len(data))
+    return data
+
+  def write(self, data):
+    self.count(len(data))
+    return self.file.write(data)
+
+  def __getattr__(self, name):
+    return getattr(self.file, name)
+
+class FakeHandler(BaseHTTPRequestHandler):
+  protocol_version = 'HTTP/1.1'
+  server_version = 'FakeJenkins/1.0'
+  disable_nagle_algorithm = True
+
+  @property
+  def state(self):
+    return self.server.state
+
+  def setup(self):
+    super().setup()
+    self.rfile = CountingFile(self.rfile, self.state, 'bytes_received')
+    self.wfile = CountingFile(self.wfile, self.state, 'bytes_sent')
+    with self.state.lock:
+      self.state.stats['connections'] += 1
+
+  def log_message(self, format, *args):
+    pass
+
+  def do_GET(self):
+    self.dispatch('GET')
+
+  def do_POST(self):
+    self.dispatch('POST')
+
+  def dispatch(self, method):
+    url = urlsplit(self.path)
+    query = parse_qs(url.query)
+    body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+    endpoint, handler = self.route(method, url.path)
+
+    with self.state.lock:
+      stats = self.state.stats
+      stats['requests'] += 1
+      stats['endpoints'][endpoint] = stats['endpoints'].get(endpoint, 0) + 1
+
+    self.state.wait()
+
+    if handler is None:
+      return self.reply(404, {'message': 'Not found'})
+    if self.state.should_fail():
+      with self.state.lock:
+        self.state.stats['failures'] += 1
+      return self.reply(500, {'message': 'Injected failure'})
+    handler(url.path, query, body)
+
+  def route(self, method, path):
+    if method == 'GET' and path == '/me/api/json':
+      return 'whoami', self.whoami
+    if method == 'GET' and path == '/crumbIssuer/api/json':
+      return 'crumb', self.crumb
+    if method == 'GET' and queue_item_route.match(path):
+      return 'queue_item', self.queue_item
+    if method == 'POST' and create_item_route.match(path):
+      return 'create_item', self.create_item
+    if method == 'GET' and path == '/api/v4/user':
+      return 'gitlab_user', self.gitlab_user
+    if method == 'GET' and path == '/api/v4/merge_requests':
+      return 'gitlab_merge_requests', self.gitlab_merge_requests
+
+    match = job_route.match(path)
+    if match:
+      action = match.group(2)
+      if method == 'GET' and match.group(3):
+        return 'build_info', self.build_info
+      if method == 'GET' and action == 'api/json':
+        return 'job_info', self.job_info
+      if method == 'POST' and action in ('build', 'buildWithParameters'):
+        return action, self.build
+    return 'other', None
+
+  def reply(self, status, payload, headers=None):
+    data = json.dumps(payload).encode('utf-8') if payload is not None else b''
+    self.send_response(status)
+    self.send_header('Content-Type', 'application/json')
+    self.send_header('Content-Length', str(len(data)))
+    for key, value in (headers or {}).items():
+      self.send_header(key, value)
+    self.end_headers()
+    self.wfile.write(data)
+
+  def base_url(self):
+    return f"http://{self.headers.get('Host')}"
+
+  # Jenkins
+  def whoami(self, path, query, body):
+    self.reply(200, {'_class': 'hudson.model.User', 'id': 'bench', 'fullName': 'Bench User'})
+
+  def crumb(self, path, query, body):
+    self.reply(200, {'_class': 'hudson.security.csrf.DefaultCrumbIssuer', 'crumb': 'fake-crumb', 'crumbRequestField': 'Jenkins-Crumb'})
+
+  def job_info(self, path, query, body):
+    name = job_name_from_path(job_route.match(path).group(1))
+    job = self.state.jobs.get(name)
+    if job is None:
+      return self.reply(404, {'message': f'Job {name} not found'})
+
+    short_name = name.split('/')[-1]
+    url = f"{self.base_url()}/{job_route.match(path).group(1)}"
+    if query.get('tree') == ['name']:
+      return self.reply(200, {'_class': 'org.jenkinsci.plugins.workflow.job.WorkflowJob', 'name': short_name})
+
+    last_build = job['last_build']
+    builds = [
+      {'_class': 'org.jenkinsci.plugins.workflow.job.WorkflowRun', 'number': number, 'url': f"{url}{number}/"}
+      for number in range(last_build, max(last_build - self.state.payload_size, 0), -1)
+    ]
+    self.reply(200, {
+      '_class': 'org.jenkinsci.plugins.workflow.job.WorkflowJob',
+      'name': short_name,
+      'fullName': name,
+      'url': url,
+      'buildable': True,
+      'builds': builds,
+      'lastBuild': builds[0] if builds else None,
+      'nextBuildNumber': last_build + 1,
+    })
+
+  def build(self, path, query, body):
+    name = job_name_from_path(job_route.match(path).group(1))
+    with self.state.lock:
+      job = self.state.jobs.get(name)
+      if job is not None:
+        job['last_build'] += 1
+        queue_id = self.state.next_queue_id
+        self.state.next_queue_id += 1
+        self.state.queue[queue_id] = {'job': name, 'number': job['last_build'], 'polls': 0}
+        self.state.builds[(name, job['last_build'])] = {'polls': 0}
+    if job is None:
+      return self.reply(404, {'message': f'Job {name} not found'})
+    self.reply(201, None, {'Location': f"{self.base_url()}/queue/item/{queue_id}/"})
+
+  def queue_item(self, path, query, body):
+    queue_id = int(queue_item_route.match(path).group(1))
+    with self.state.lock:
+      item = self.state.queue.get(queue_id)
+      if item is not None:
+        item['polls'] += 1
+        waiting = item['polls'] <= self.state.queue_polls
+    if item is None:
+      return self.reply(404, {'message': f'Queue item {queue_id} not found'})
+
+    folder_url = ''.join(f"job/{segment}/" for segment in item['job'].split('/'))
+    self.reply(200, {
+      '_class': 'hudson.model.Queue$LeftItem' if not waiting else 'hudson.model.Queue$WaitingItem',
+      'id': queue_id,
+      'why': 'Waiting for next available executor' if waiting else None,
+      'cancelled': False,
+      'executable': None if waiting else {
+        'number': item['number'],
+        'url': f"{self.base_url()}/{folder_url}{item['number']}/",
+      },
+    })
+
+  def build_info(self, path, query, body):
+    match = job_route.match(path)
+    name = job_name_from_path(match.group(1))
+    number = int(match.group(3))
+    with self.state.lock:
+      build = self.state.builds.setdefault((name, number), {'polls': 0})
+      build['polls'] += 1
+      running = build['polls'] <= self.state.build_polls
+    if name not in self.state.jobs:
+      return self.reply(404, {'message': f'Job {name} not found'})
+
+    self.reply(200, {
+      '_class': 'org.jenkinsci.plugins.workflow.job.WorkflowRun',
+      'number': number,
+      'url': f"{self.base_url()}/{match.group(1)}{number}/",
+      'building': running,
+      'result': None if running else 'SUCCESS',
+      'actions': [{'_class': 'hudson.model.ParametersAction', 'index': i} for i in range(self.state.payload_size)],
+    })
+
+  def create_item(self, path, query, body):
+    folder = job_name_from_path(create_item_route.match(path).group(1))
+    short_name = query.get('name', [''])[0]
+    name = f"{folder}/{short_name}" if folder else short_name
+    if name in self.state.jobs:
+      return self.reply(400, {'message': f'A job already exists with the name {name}'})
+    self.state.add_job(name, body.decode('utf-8'))
+    self.reply(200, None)
+
+  # GitLab
+  def gitlab_user(self, path, query, body):
+    self.reply(200, {'id': 42, 'username': 'bench', 'name': 'Bench User', 'web_url': f"{self.base_url()}/bench"})
+
+  def gitlab_merge_requests(self, path, query, body):
+    self.reply(200, [
+      {
+        'id': 1000 + i,
+        'iid': i,
+        'project_id': 1,
+        'title': f'Story {i}',
+        'state': 'opened',
+        'upvotes': i % 3,
+        'web_url': f"{self.base_url()}/product/-/merge_requests/{i}",
+      }
+      for i in range(1, self.state.payload_size + 1)
+    ])
+
+class FakeServer:
+  """Run a fake Jenkins/GitLab server in a background thread.
+
+  Usage:
+    with FakeServer(latency=0.05, jobs=['Product/Build/main']) as server:
+      ...  # point ServerUrl at server.url
+  """
+
+  def __init__(self, host='127.0.0.1', port=0, **options):
+    self.httpd = ThreadingHTTPServer((host, port), FakeHandler)
+    self.httpd.daemon_threads = True
+    self.httpd.state = FakeState(**options)
+    self.thread = None
+
+  @property
+  def state(self):
+    return self.httpd.state
+
+  @property
+  def url(self):
+    host, port = self.httpd.server_address[:2]
+    return f"http://{host}:{port}"
+
+  def start(self):
+    self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+    self.thread.start()
+    return self
+
+  def stop(self):
+    self.httpd.shutdown()
+    self.httpd.server_close()
+
+  def __enter__(self):
+    return self.start()
+
+  def __exit__(self, *exc):
+    self.stop()
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description='Offline fake Jenkins/GitLab server')
+  parser.add_argument('--host', default='127.0.0.1', type=str, help='Bind address')
+  parser.add_argument('--port', default=8080, type=int, help='Bind port')
+  parser.add_argument('--latency', default=0.0, type=float, help='Latency added to every request (seconds)')
+  parser.add_argument('--jitter', default=0.0, type=float, help='Random extra latency up to this value (seconds)')
+  parser.add_argument('--payload-size', default=10, type=int, help='Number of builds, actions and merge requests returned')
+  parser.add_argument('--failure-rate', default=0.0, type=float, help='Probability of answering a request with HTTP 500')
+  parser.add_argument('--queue-polls', default=1, type=int, help='Queue polls answered with "why" before the build starts')
+  parser.add_argument('--build-polls', default=1, type=int, help='Build polls answered with no result before it succeeds')
+  parser.add_argument('--job', dest='jobs', default=[], action='append', help='Pre-existing job full name (repeatable)')
+  args = parser.parse_args()
+
+  server = FakeServer(
+    host=args.host,
+    port=args.port,
+    latency=args.latency,
+    jitter=args.jitter,
+    payload_size=args.payload_size,
+    failure_rate=args.failure_rate,
+    queue_polls=args.queue_polls,
+    build_polls=args.build_polls,
+    jobs=args.jobs,
+  )
+  print(f"Fake Jenkins/GitLab listening on {server.url}")
+  try:
+    server.httpd.serve_forever()
+  except KeyboardInterrupt:
+    server.httpd.server_close()
@@ -0,0 +1,282 @@
+"""End-to-end benchmark of the jks subcommands against the fake server.
+
+Every subcommand is run in-process with `confirm` bypassed, and for each
+run the suite records wall time plus the request count, connection count
+and raw bytes (headers included) seen by the fake server. Results are
+written as JSON so that two runs can be compared with --baseline.
+
+  python bench/run.py
+  python bench/run.py --latency 0.05 --repeat 5 --baseline bench/results/baseline.json
+"""
+import io
+import os
+import sys
+import json
+import time
+import zlib
+import pathlib
+import argparse
+import platform
+import statistics
+import subprocess
+import configparser
+import contextlib
+from types import SimpleNamespace
+from termcolor import colored
+
+bench_dir = pathlib.Path(__file__).parent.resolve()
+sys.path.insert(0, str(bench_dir.parent))
+
+import jks
+from fake_server import FakeServer
+
+branch_name = 'story/1234'
+env_name = 'dev1234'
+
+# Jobs the subcommands expect to find on the server
+seeded_jobs = [
+  f'Ondemand/GKE/Start/{jks.quote_plus(branch_name)}',
+  f'Ondemand/GKE/Create/{jks.quote_plus(branch_name)}',
+  'Ondemand/GKE/Drop',
+  f'Product/Build/{jks.quote_plus(branch_name)}',
+  'Bots/ProductBot/MR_Open_Review',
+  'Bots/ProductBot/Update_Story_Validation_Status',
+]
+
+def args_for(**values):
+  defaults = {
+    'branch': branch_name,
+    'env': env_name,
+    'installation_id': 'saagie',
+    'kubernetes_version': '',
+    'test_types': [],
+    'product_version': '',
+    'auth': 'keycloak',
+    'features': '',
+    'format': '0 2 * * *',
+    'card': 'PRODUCT-1234',
+    'name': None,
+    'build': [branch_name, 'story/5678', 'story/9012'],
+    'deploy': [f'{branch_name}:{env_name}', 'story/5678:dev5678'],
+    'start': [],
+  }
+  defaults.update(values)
+  return SimpleNamespace(**defaults)
+
+# Scenario name -> (callable, args, profiles)
+scenarios = {
+  'connect': (lambda args: jks.connect_to_jenkins(jks.custom_config['JENKINS']), args_for(), ['default']),
+  'start': (lambda args: jks.start(args), args_for(), ['default']),
+  'create': (lambda args: jks.create(args), args_for(), ['default']),
+  'drop': (lambda args: jks.drop(args), args_for(), ['default']),
+  'cron_start': (lambda args: jks.cronStart(args), args_for(), ['default']),
+  'cron_create': (lambda args: jks.cronCreate(args), args_for(), ['default']),
+  'cron_build': (lambda args: jks.cronBuild(args), args_for(), ['default']),
+  'cron_pipeline': (lambda args: jks.cronPipeline(args), args_for(), ['default']),
+  'build': (lambda args: jks.build(args), args_for(), ['default']),
+  'open_mr': (lambda args: jks.open_mr(args), args_for(), ['default']),
+  'get_assigned_mr': (lambda args: jks.get_assigned_mr(args), args_for(), ['default']),
+  'build_info': (lambda args: jks.build_info(args), args_for(), ['default']),
+  'start_fanout': (lambda args: jks.start(args), args_for(), ['staging', 'production']),
+  'drop_fanout': (lambda args: jks.drop(args), args_for(), ['staging', 'production']),
+}
+
+# Scenarios skipped when jks lacks their entry point, to benchmark older revisions
+scenario_requires = {
+  'cron_pipeline': 'cronPipeline',
+  'start_fanout': 'resolve_profiles',
+  'drop_fanout': 'resolve_profiles',
+}
+
+class ScaledTime:
+  """Proxy of the `time` module seen by jks with a scaled `sleep`.
+
+  The client side waits (spinner, polling intervals) would otherwise
+  dominate the measure; they are scaled and accounted separately.
+  """
+
+  def __init__(self, scale):
+    self.scale = scale
+    self.slept = 0.0
+
+  def sleep(self, seconds):
+    self.slept += seconds
+    if self.scale > 0:
+      time.sleep(seconds * self.scale)
+
+  def __getattr__(self, name):
+    return getattr(time, name)
+
+class NoShell:
+  """Proxy of the `os` module seen by jks that never runs shell commands."""
+
+  def __init__(self):
+    self.commands = []
+
+  def system(self, command):
+    self.commands.append(command)
+    return 0
+
+  def __getattr__(self, name):
+    return getattr(os, name)
+
+class NoLoader:
+  """Stand-in for the TextLoader spinner, its thread writes to the terminal directly."""
+
+  def start(self):
+    pass
+
+  def stop(self):
+    pass
+
+def make_configs(server_url, profiles, fan_out):
+  # Every profile targets the fake server with its own user, so its own pooled client
+  jks_config = configparser.ConfigParser()
+  jks_config.read_dict({
+    'JENKINS': {'ServerUrl': server_url, 'Username': 'bench', 'ApiKey': 'bench'},
+    'GITLAB': {'ServerUrl': server_url, 'ApiKey': 'bench'},
+    'SLACK': {'UserId': 'U000BENCH'},
+    'TERMINAL': {'NotificationBuild': 'true'},
+    **{f'JENKINS:{profile}': {'ServerUrl': server_url, 'Username': f'bench-{profile}', 'ApiKey': 'bench'} for profile in profiles if profile != 'default'},
+  })
+  if not hasattr(jks, 'resolve_profiles'):
+    return {'default': jks_config}
+  return jks.resolve_profiles(jks_config, ','.join(profiles), fan_out=fan_out)
+
+def run_scenario(name, options, repeat, sleep_scale, verbose):
+  func, args, profiles = scenarios[name]
+  runs = []
+
+  for run in range(repeat):
+    # A fresh server per run so created jobs and build numbers do not leak,
+    # seeded by scenario too so scenarios do not fail at the same request
+    seed = options['seed'] + zlib.crc32(name.encode('utf-8')) + run
+    with FakeServer(jobs=seeded_jobs, **{**options, 'seed': seed}) as server:
+      fake_time = ScaledTime(sleep_scale)
+      jks.custom_configs = make_configs(server.url, profiles, fan_out=name.endswith('_fanout'))
+      jks.custom_config = next(iter(jks.custom_configs.values()))
+      for pool in (getattr(jks, 'jenkins_servers', {}), getattr(jks, 'gitlab_servers', {})):
+        pool.clear()
+      jks.confirm = lambda question: True
+      jks.time = fake_time
+      jks.os = NoShell()
+      jks.TextLoader = NoLoader
+      jks.args = args
+
+      status = 'ok'
+      output = io.StringIO()
+      start = time.perf_counter()
+      try:
+        with contextlib.redirect_stdout(sys.stdout if verbose else output), contextlib.redirect_stderr(sys.stderr if verbose else output):
+          func(args)
+      except SystemExit as e:
+        status = f'exit({e.code})'
+      except Exception as e:
+        status = type(e).__name__
+      wall_time = time.perf_counter() - start
+
+      stats = server.state.snapshot_stats()
+    runs.append({
+      'status': status,
+      'wall_time': wall_time,
+      'client_sleep': fake_time.slept,
+      **stats,
+    })
+
+  wall_times = [run['wall_time'] for run in runs]
+  failed_runs = [run for run in runs if run['status'] != 'ok']
+  endpoints = dict.fromkeys(endpoint for run in runs for endpoint in run['endpoints'])
+  return {
+    'status': 'ok' if not failed_runs else f"{len(failed_runs)}/{len(runs)} failed",
+    'statuses': [run['status'] for run in runs],
+    'failed_runs': len(failed_runs),
+    'wall_time': {
+      'min': min(wall_times),
+      'median': statistics.median(wall_times),
+      'max': max(wall_times),
+    },
+    # Medians across runs
+    **{
+      key: statistics.median(run[key] for run in runs)
+      for key in ('client_sleep', 'requests', 'connections', 'bytes_sent', 'bytes_received', 'failures')
+    },
+    'endpoints': {endpoint: statistics.median(run['endpoints'].get(endpoint, 0) for run in runs) for endpoint in endpoints},
+    'runs': runs,
+  }
+
+def get_git_revision():
+  # Suffixed with -dirty when tracked files differ from the commit
+  try:
+    revision = subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=bench_dir, stderr=subprocess.DEVNULL).decode('utf-8').strip()
+    changes = subprocess.check_output(['git', 'status', '--porcelain', '--untracked-files=no', '--', ':/', ':(exclude,top)bench/results'], cwd=bench_dir, stderr=subprocess.DEVNULL).decode('utf-8').strip()
+    return f"{revision}-dirty" if changes else revision
+  except (subprocess.CalledProcessError, OSError):
+    return None
+
+def print_results(results, baseline=None):
+  print(f"{'scenario':<16} {'status':<16} {'median (s)':>11} {'requests':>9} {'conns':>6} {'fails':>6} {'bytes':>9}")
+  for name, result in results.items():
+    line = f"{name:<16} {result['status']:<16} {result['wall_time']['median']:>11.4f} {result['requests']:>9g} {result['connections']:>6g} {result['failures']:>6g} {result['bytes_sent'] + result['bytes_received']:>9g}"
+    previous = (baseline or {}).get(name)
+    if previous:
+      delta = result['wall_time']['median'] - previous['wall_time']['median']
+      requests_delta = result['requests'] - previous['requests']
+      line += f"  {colored(f'{delta:+.4f}s', 'green' if delta <= 0 else 'red')} {colored(f'{requests_delta:+g} req', 'green' if requests_delta <= 0 else 'red')}"
+    print(line)
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description='Benchmark jks subcommands against an offline fake Jenkins/GitLab')
+  parser.add_argument('-s', '--scenario', dest='scenarios', default=[], action='append', choices=list(scenarios), help='Scenario to run (repeatable, default: all)')
+  parser.add_argument('-r', '--repeat', default=3, type=int, help='Runs per scenario')
+  parser.add_argument('--latency', default=0.0, type=float, help='Server latency per request (seconds)')
+  parser.add_argument('--jitter', default=0.0, type=float, help='Random extra server latency (seconds)')
+  parser.add_argument('--payload-size', default=10, type=int, help='Number of builds, actions and merge requests returned')
+  parser.add_argument('--failure-rate', default=0.0, type=float, help='Probability of an injected HTTP 500')
+  parser.add_argument('--queue-polls', default=1, type=int, help='Queue polls before a build leaves the queue')
+  parser.add_argument('--build-polls', default=1, type=int, help='Build polls before a build has a result')
+  parser.add_argument('--sleep-scale', default=0.0, type=float, help='Factor applied to client side sleeps (0 skips them)')
+  parser.add_argument('--seed', default=0, type=int, help='Seed of the failure injection')
+  parser.add_argument('-o', '--output', default=None, type=str, help='Result file (default: bench/results/<timestamp>.json, not tracked by git)')
+  parser.add_argument('--baseline', default=None, type=str, help='Previous result file to compare with')
+  parser.add_argument('--note', default=None, type=str, help='Free text stored with the results (e.g. patches applied)')
+  parser.add_argument('-v', '--verbose', action='store_true', help='Show jks output')
+  args = parser.parse_args()
+
+  options = {
+    'latency': args.latency,
+    'jitter': args.jitter,
+    'payload_size': args.payload_size,
+    'failure_rate': args.failure_rate,
+    'queue_polls': args.queue_polls,
+    'build_polls': args.build_polls,
+    'seed': args.seed,
+  }
+
+  results = {}
+  for name in args.scenarios or list(scenarios):
+    if not hasattr(jks, scenario_requires.get(name, '__name__')):
+      print(f"{colored('[Skip]', 'yellow')} {name}: jks has no {scenario_requires[name]}")
+      continue
+    results[name] = run_scenario(name, options, args.repeat, args.sleep_scale, args.verbose)
+
+  report = {
+    'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    'git_revision': get_git_revision(),
+    'python': platform.python_version(),
+    'note': args.note,
+    'options': {**options, 'repeat': args.repeat, 'sleep_scale': args.sleep_scale},
+    'results': results,
+  }
+
+  output_path = pathlib.Path(args.output) if args.output else bench_dir / 'results' / f"{time.strftime('%Y%m%d-%H%M%S')}.json"
+  output_path.parent.mkdir(parents=True, exist_ok=True)
+  with open(output_path, 'w') as file:
+    json.dump(report, file, indent=2)
+
+  baseline = None
+  if args.baseline:
+    with open(args.baseline, 'r') as file:
+      baseline = json.load(file)['results']
+
+  print_results(results, baseline)
+  print(f"{colored('[Success]', 'cyan')} results written to {output_path}")
@@ -13,13 +13,19 @@ from croniter import croniter
 from termcolor import colored
 from rich.console import Console
 from urllib.parse import quote_plus
+from xml.sax.saxutils import escape
 from kubernetes import client, config
+from concurrent.futures import ThreadPoolExecutor
 from loaders import TextLoader
 
 # Logging
 logging.basicConfig(filename='/tmp/jks.log', level=logging.DEBUG, format='%(asctime)s %(levelname)s %(name)s %(message)s')
 logger=logging.getLogger(__name__)
 
+# Connection pool: one client, and so one keep-alive session, per server
+jenkins_servers = {}
+gitlab_servers = {}
+
 # Templates
 pipeline_template = """
   <flow-definition plugin="workflow-job@1268.v6eb_e2ee1a_85a">
@@ -67,35 +73,66 @@ cron_template = """
 """
 
 # Stage templates
-start_stage_template = """
-  stage('Start') {{
-    steps {{
+start_step_template = """
       build job: 'Ondemand/GKE/Start/{branch_name}', parameters: [
         [$class: 'StringParameterValue', name: 'prefix_name', value: '{env_name}' ],
         [$class: 'BooleanParameterValue', name: 'confirm', value: true]
       ]
-    }}
-  }}
 """
-build_stage_template = """
-  stage('Build') {{
-    steps {{
+build_step_template = """
       build job: 'Product/Build/{branch_name}'
-    }}
-  }}
 """
-deploy_stage_template = """
-  stage('Deploy') {{
-    steps {{
+deploy_step_template = """
       build job: 'Ondemand/GKE/Create/{branch_name}', parameters: [
         [$class: 'StringParameterValue', name: 'prefix_name', value: '{env_name}' ],
         [$class: 'BooleanParameterValue', name: 'confirm', value: true],
         [$class: 'BooleanParameterValue', name: 'create_env', value: true],
         [$class: 'BooleanParameterValue', name: 'install_product', value: true]
       ]
+"""
+stage_template = """
+  stage('{stage_name}') {{
+    steps {{
+      {steps}
+    }}
+  }}
+"""
+sequential_stage_template = """
+  stage('{stage_name}') {{
+    stages {{
+      {stages}
+    }}
+  }}
+"""
+parallel_stage_template = """
+  stage('{stage_name}') {{
+    parallel {{
+      {stages}
     }}
   }}
 """
+# Scripted stages, used in a script step where declarative parallel can't be nested
+scripted_stage_template = """
+  stage('{stage_name}') {{
+    {steps}
+  }}
+"""
+scripted_parallel_template = """
+  script {{
+    parallel(
+      {branches}
+    )
+  }}
+"""
+scripted_branch_template = """
+  '{branch_name}': {{
+    {steps}
+  }}"""
+step_templates = {
+  'build': build_step_template,
+  'deploy': deploy_step_template,
+  'start': start_step_template,
+}
 
 # Post Build
 post_slack_notification = """
@@ -113,11 +150,17 @@ def confirm(question):
       answer = input(question).lower()
   return answer == "y"
 
-def get_gitlab_user_id(server_url, token):
-  try:
+def get_gitlab_server(server_url, token):
+  key = (server_url, token)
+  if key not in gitlab_servers:
     gl = gitlab.Gitlab(server_url, private_token=token)
-
     gl.auth()
+    gitlab_servers.setdefault(key, gl)
+  return gitlab_servers[key]
+
+def get_gitlab_user_id(server_url, token):
+  try:
+    gl = get_gitlab_server(server_url, token)
 
     return gl.user.id
   except Exception as e:
@@ -136,19 +179,102 @@ def read_config_file(file_path):
     logger.error(e)
     sys.exit(1)
 
+def get_profile_config(config, profile):
+  """Resolve the sections of a profile: [JENKINS:staging] overrides [JENKINS]"""
+  profile_config = configparser.ConfigParser()
+  names = dict.fromkeys(section.split(':')[0] for section in config.sections())
+  found = profile == 'default'
+
+  for name in names:
+    section = f"{name}:{profile}"
+    if profile != 'default' and config.has_section(section):
+      found = True
+    else:
+      section = name
+    if config.has_section(section):
+      # Raw values, interpolation is resolved by the profile config
+      profile_config.read_dict({name: dict(config.items(section, raw=True))})
+
+  if not found:
+    print(f"{colored('[Error]', 'red')} Profile {profile} not found")
+    logger.error(f"Profile {profile} not found")
+    sys.exit(1)
+  return profile_config
+
+def get_profile_targets(profile_configs):
+  """Keep one profile per jenkins server and user, so a job is not triggered twice"""
+  targets = {}
+  for profile, profile_config in profile_configs.items():
+    credentials = profile_config['JENKINS'] if profile_config.has_section('JENKINS') else {}
+    key = (credentials.get('ServerUrl'), credentials.get('Username'))
+    if key in targets:
+      print(f"{colored('[Warning]', 'yellow')} Profile {profile} uses the same jenkins server as {targets[key]}, skipped")
+      continue
+    targets[key] = profile
+  return {profile: profile_configs[profile] for profile in targets.values()}
+
+def resolve_profiles(config, profile=None, fan_out=False):
+  """Resolve the comma-separated profiles (default: $JKS_PROFILE or default), several are only allowed for a fan out"""
+  profile = profile or os.environ.get('JKS_PROFILE') or 'default'
+  profiles = list(dict.fromkeys(name.strip() for name in profile.split(',') if name.strip())) or ['default']
+
+  if profiles.__len__() > 1 and not fan_out:
+    print(f"{colored('[Error]', 'red')} Several profiles are only supported by start and drop")
+    sys.exit(1)
+
+  profile_configs = {name: get_profile_config(config, name) for name in profiles}
+  return get_profile_targets(profile_configs) if fan_out else profile_configs
+
+def get_jenkins_server(credentials):
+  key = (credentials.get('ServerUrl'), credentials.get('Username'), credentials.get('ApiKey'))
+  if key not in jenkins_servers:
+    server = jenkins.Jenkins(credentials.get('ServerUrl'), username=credentials.get('Username'), password=credentials.get('ApiKey'))
+    server.get_whoami()
+    jenkins_servers.setdefault(key, server)
+  return jenkins_servers[key]
+
 def connect_to_jenkins(credentials):
   console = Console()
   with console.status("[bold cyan]Connecting to jenkins...") as status:
     time.sleep(1)
     try:
-      server = jenkins.Jenkins(credentials.get('ServerUrl'), username=credentials.get('Username'), password=credentials.get('ApiKey'))
-      server.get_whoami()
-      return server
+      return get_jenkins_server(credentials)
+    except jenkins.JenkinsException as e:
+      print(f"{colored('[Error]', 'red')} An exception occurred look at /tmp/jks.log");
+      logger.error(e)
+      sys.exit(1)
+
+def connect_to_jenkins_servers(profile_configs):
+  console = Console()
+  with console.status("[bold cyan]Connecting to jenkins servers...") as status:
+    try:
+      with ThreadPoolExecutor(max_workers=len(profile_configs)) as executor:
+        return list(executor.map(lambda profile_config: get_jenkins_server(profile_config['JENKINS']), profile_configs))
     except jenkins.JenkinsException as e:
       print(f"{colored('[Error]', 'red')} An exception occurred look at /tmp/jks.log");
       logger.error(e)
       sys.exit(1)
 
+def run_on_profiles(func):
+  """Call func(server, profile_config) for every selected profile, concurrently when there are several"""
+  if custom_configs.__len__() == 1:
+    return [func(connect_to_jenkins(custom_config['JENKINS']), custom_config)]
+
+  servers = connect_to_jenkins_servers(list(custom_configs.values()))
+  with ThreadPoolExecutor(max_workers=len(servers)) as executor:
+    results = list(executor.map(func, servers, custom_configs.values()))
+
+  for profile, result in zip(custom_configs, results):
+    if result is None:
+      print(f"• {profile}: {colored('[Error] build not started', 'red')}")
+    else:
+      print(f"• {profile}: {colored(f'build number {result}', 'green')}")
+  return results
+
+def print_profiles():
+  if custom_configs.__len__() > 1:
+    print(f"• Servers: {colored(', '.join(custom_configs), 'green')}")
+
 def get_git_branch_name():
   try:
     # Exécuter la commande git pour obtenir le nom de la branche
@@ -200,12 +326,80 @@ def check_git_branch_name(branch_name):
     print(colored('[Error]', 'red') + ' You can\'t deploy master branch')
     sys.exit(1)
 
-def check_equal_values(dict):
-    # Get all values from dict filter None
-    filtered_values = [value for value in dict.values()]
+def check_branch_name_not_empty(branch_name, value):
+  if not branch_name.strip():
+    print(f"{colored('[Error]', 'red')} Branch name is missing in '{value}'")
+    logger.error(f"Branch name is missing in '{value}'")
+    sys.exit(1)
+
+def get_branch_env(value):
+  # Split "branch:env", use current environment when env is omitted
+  branch_name, _, env_name = value.rpartition(':') if ':' in value else (value, '', '')
+  check_branch_name_not_empty(branch_name, value)
+
+  branch_name = get_branch_name(branch_name)
+  check_git_branch_name(branch_name)
+  return branch_name, get_env_name(env_name or 'current')
 
-    # Check if all values are equal
-    return len(set(filtered_values)) <= 1
+def groovy_string(value):
+  # Escape a value used inside a single-quoted groovy string
+  return str(value).replace('\\', '\\\\').replace("'", "\\'")
+
+def make_stage(type, branch_name, env_name=None, after=None):
+  names = {
+    'build': f"Build {branch_name}",
+    'deploy': f"Deploy {branch_name} on {env_name}",
+    'start': f"Start {branch_name} on {env_name}",
+  }
+  return {'name': names[type], 'type': type, 'branch': branch_name, 'env': env_name, 'after': after or []}
+
+def check_one_stage_per_env(type, stages):
+  envs = [env_name for _, env_name in stages]
+  for env_name in dict.fromkeys(envs):
+    if envs.count(env_name) > 1:
+      print(f"{colored('[Error]', 'red')} Only one {type} per env, {env_name} has {envs.count(env_name)}")
+      logger.error(f"Only one {type} per env, {env_name} has {envs.count(env_name)}")
+      sys.exit(1)
+
+def get_pipeline_stages(builds, deploys, starts):
+  """Build the stage graph: a deploy waits for the build of its branch, a start waits for the deploy of its env"""
+  # Two deploys or starts on one env would race on the same prefix_name
+  check_one_stage_per_env('deploy', deploys)
+  check_one_stage_per_env('start', starts)
+
+  stages = [make_stage('build', branch_name) for branch_name in builds]
+
+  for branch_name, env_name in deploys:
+    after = [stage['name'] for stage in stages if stage['type'] == 'build' and stage['branch'] == branch_name]
+    stages.append(make_stage('deploy', branch_name, env_name, after))
+
+  for branch_name, env_name in starts:
+    after = [stage['name'] for stage in stages if stage['type'] == 'deploy' and stage['env'] == env_name]
+    stages.append(make_stage('start', branch_name, env_name, after))
+
+  return stages
+
+def get_stage_levels(stages):
+  """Group stages by dependency depth, stages of a same level are independent"""
+  names = [stage['name'] for stage in stages]
+  if len(set(names)) != len(names):
+    print(f"{colored('[Error]', 'red')} A pipeline can't contain the same stage twice")
+    sys.exit(1)
+
+  levels = []
+  done = set()
+  remaining = list(stages)
+  while remaining:
+    level = [stage for stage in remaining if all(name in done for name in stage['after'])]
+    if not level:
+      print(f"{colored('[Error]', 'red')} Pipeline stages have unknown or circular dependencies")
+      logger.error(f"Unresolved stages: {[stage['name'] for stage in remaining]}")
+      sys.exit(1)
+    levels.append(level)
+    done.update(stage['name'] for stage in level)
+    remaining = [stage for stage in remaining if stage not in level]
+
+  return levels
 
 # To do : get build progression
 def get_build_progresion(server, project_name, build_number):
@@ -225,16 +419,84 @@ def get_build_progresion(server, project_name, build_number):
     build_info = server.get_build_info(project_name, queue_info['executable']['number'])
     print(build_info)
 
-def create_pipeline(server, name, env, cron, slack_user_id, type):
-  stages = []
+def get_stage_trees(stages):
+  """Group stages in trees: a stage with a single dependency follows it, a stage with several starts a new tree"""
+  children = {stage['name']: [] for stage in stages}
+  trees = []
+  tree_of = {}
+  for level in get_stage_levels(stages):
+    for stage in level:
+      if stage['after'].__len__() == 1:
+        children[stage['after'][0]].append(stage)
+        tree_of[stage['name']] = tree_of[stage['after'][0]]
+      else:
+        tree = {'root': stage, 'after': [tree_of[name] for name in stage['after']]}
+        trees.append(tree)
+        tree_of[stage['name']] = tree
+
+  for tree in trees:
+    tree['children'] = children
+    tree['name'] = get_tree_label(tree['root'], children)
+  for tree in trees:
+    tree['after'] = list(dict.fromkeys(dependency['name'] for dependency in tree['after']))
+  return trees
+
+def get_tree_label(stage, children):
+  # "Build a > (Deploy a on dev1 | Deploy a on dev2)"
+  next_stages = children[stage['name']]
+  if next_stages.__len__() == 1:
+    return f"{stage['name']} > {get_tree_label(next_stages[0], children)}"
+  if next_stages.__len__() > 1:
+    return f"{stage['name']} > ({' | '.join(get_tree_label(next_stage, children) for next_stage in next_stages)})"
+  return stage['name']
+
+def render_steps(stage):
+  return step_templates[stage['type']].format(branch_name=quote_plus(stage['branch']), env_name=groovy_string(stage['env'] or ''))
+
+def render_scripted_stages(stage, children):
+  # Stage then what follows it, forks run in a nested scripted parallel
+  steps = [scripted_stage_template.format(stage_name=groovy_string(stage['name']), steps=render_steps(stage))]
+  next_stages = children[stage['name']]
+  if next_stages.__len__() == 1:
+    steps.append(render_scripted_stages(next_stages[0], children))
+  elif next_stages.__len__() > 1:
+    steps.append(render_scripted_parallel(next_stages, children))
+  return '\n'.join(steps)
+
+def render_scripted_parallel(stages, children):
+  branches = [
+    scripted_branch_template.format(branch_name=groovy_string(get_tree_label(stage, children)), steps=render_scripted_stages(stage, children))
+    for stage in stages
+  ]
+  return scripted_parallel_template.format(branches=','.join(branches))
+
+def render_tree_stages(stage, children):
+  """Declarative stages of a tree: a chain is rendered stage by stage, a fork as one stage running a scripted parallel"""
+  stages = [stage_template.format(stage_name=groovy_string(stage['name']), steps=render_steps(stage))]
+  next_stages = children[stage['name']]
+  if next_stages.__len__() == 1:
+    stages.extend(render_tree_stages(next_stages[0], children))
+  elif next_stages.__len__() > 1:
+    fork_name = ' | '.join(get_tree_label(next_stage, children) for next_stage in next_stages)
+    stages.append(stage_template.format(stage_name=groovy_string(fork_name), steps=render_scripted_parallel(next_stages, children)))
+  return stages
+
+def create_pipeline(server, name, cron, slack_user_id, stages):
+  flow = []
   postBuild = [];
 
-  if 'build' in type:
-    stages.append(build_stage_template.format(branch_name=quote_plus(type['build']), env_name=env))
-  if 'deploy' in type:
-    stages.append(deploy_stage_template.format(branch_name=quote_plus(type['deploy']), env_name=env))
-  if 'start' in type:
-    stages.append(start_stage_template.format(branch_name=quote_plus(type['start']), env_name=env))
+  # Independent trees run in a parallel block, each one follows its own dependencies (forks included).
+  # Phases only split trees waiting on several others, they run one after the other.
+  for index, level in enumerate(get_stage_levels(get_stage_trees(stages))):
+    if level.__len__() == 1:
+      flow.extend(render_tree_stages(level[0]['root'], level[0]['children']))
+      continue
+
+    level_stages = []
+    for tree in level:
+      tree_stages = render_tree_stages(tree['root'], tree['children'])
+      level_stages.append(tree_stages[0] if tree_stages.__len__() == 1 else sequential_stage_template.format(stage_name=groovy_string(tree['name']), stages='\n'.join(tree_stages)))
+    flow.append(parallel_stage_template.format(stage_name=f"Phase {index + 1}", stages='\n'.join(level_stages)))
 
   if slack_user_id:
     postBuild.append(post_slack_notification.format(username=slack_user_id))
@@ -250,14 +512,14 @@ def create_pipeline(server, name, env, cron, slack_user_id, type):
       }}
     }}
   """.format(
-      stage='\n'.join(stages),
+      stage='\n'.join(flow),
       postBuild='\n'.join(postBuild)
-    ) if stages.__len__() > 0 or postBuild.__len__() > 0 else ''
+    ) if flow.__len__() > 0 or postBuild.__len__() > 0 else ''
 
 
-  cron_flow = cron_template.format(cron=cron) if cron is not None else ''
+  cron_flow = cron_template.format(cron=escape(cron)) if cron is not None else ''
 
-  template = pipeline_template.format(script=script_flow, cron=cron_flow)
+  template = pipeline_template.format(script=escape(script_flow), cron=cron_flow)
 
   try:
     server.create_job(f"Playground/test/{re.sub(r'[^a-zA-Z0-9]', '.', name)}", template)
@@ -307,6 +569,8 @@ def delete_env(server, env_name, slack_user_id = ''):
   except jenkins.JenkinsException as e:
     print(f"{colored('[Error]', 'red')} An exception occurred look at /tmp/jks.log");
     logger.error(e)
+
+  return build_number
   
 def start_env(server, branch_name, env_name, show_progression = False, slack_user_id = ''):
   build_number = None
@@ -332,6 +596,8 @@ def start_env(server, branch_name, env_name, show_progression = False, slack_use
   if show_progression:
     get_build_progresion(server, project_name, build_number);
 
+  return build_number
+
 def start_build(server, branch_name, show_progression = True):
   build_number = None
 
@@ -463,34 +729,30 @@ def create(args):
     );
 
 def start(args):
-  """Start an environment gke with command line args"""
-  # Connect to jenkins
-  server = connect_to_jenkins(custom_config['JENKINS'])
-
+  """Start an environment gke with command line args, on every selected profile"""
   branch_name = get_branch_name(args.branch)
   env = get_env_name(args.env)
 
   print(f"{colored('[Start]', 'cyan')}:")
   print(f"• Branch: {colored(branch_name, 'green')}")
   print(f"• Env: {colored(env, 'green')}")
+  print_profiles()
 
   if confirm(f"{colored('Are you sure [Y/N]? ', 'light_blue', attrs=['bold'])}"):
     # Start envs
-    start_env(server, branch_name, env, slack_user_id=custom_config['SLACK']['UserId'])
+    run_on_profiles(lambda server, profile_config: start_env(server, branch_name, env, slack_user_id=profile_config['SLACK']['UserId']))
 
 def drop(args):
-  """Drop an environment gke with command line args"""
-  # Connect to jenkins
-  server = connect_to_jenkins(custom_config['JENKINS'])
-
+  """Drop an environment gke with command line args, on every selected profile"""
   env = get_env_name(args.env)
 
   print(f"{colored('[Delete]', 'cyan')}:")
   print(f"• Env: {colored(env, 'green')}")
+  print_profiles()
 
   if confirm(f"{colored('Are you sure [Y/N]? ', 'light_blue', attrs=['bold'])}"):
     # Remove envs
-    delete_env(server, env, slack_user_id=custom_config['SLACK']['UserId'])   
+    run_on_profiles(lambda server, profile_config: delete_env(server, env, slack_user_id=profile_config['SLACK']['UserId']))
 
 def cron(args, action):
   """Cron an environment gke with command line args"""
@@ -499,22 +761,23 @@ def cron(args, action):
   server = connect_to_jenkins(custom_config['JENKINS'])
 
   branch_name = get_branch_name(args.branch)
-  env = get_env_name(args.env)
+  env = get_env_name(args.env) if action != "build" else None
 
-  type = {}
+  stages = []
   if action == "start":      
-    type['start'] = branch_name
-    print(f"{colored('[Cron Start]', 'cyan')} {colored(type['start'], 'green')}:")
+    stages.append(make_stage('start', branch_name, env))
+    print(f"{colored('[Cron Start]', 'cyan')} {colored(branch_name, 'green')}:")
   if action == "build":
-    type['build'] = branch_name
-    print(f"{colored('[Cron Build]', 'cyan')} {colored(type['build'], 'green')}:")
+    stages.append(make_stage('build', branch_name))
+    print(f"{colored('[Cron Build]', 'cyan')} {colored(branch_name, 'green')}:")
   if action == "create":
-    type['deploy'] = branch_name
-    print(f"{colored('[Cron Create]', 'cyan')} {colored(type['deploy'], 'green')}:")
+    stages.append(make_stage('deploy', branch_name, env))
+    print(f"{colored('[Cron Create]', 'cyan')} {colored(branch_name, 'green')}:")
     print(f"• Installation Id: {colored(args.installation_id, 'green')}")
   
   print(f"• Branch: {colored(branch_name, 'green')}")
-  print(f"• Env: {colored(env, 'green')}")
+  if env:
+    print(f"• Env: {colored(env, 'green')}")
   
   if croniter.is_valid(args.format) is False:
     print(f"{colored('[Error]', 'red')} Cron is not valid")
@@ -522,18 +785,42 @@ def cron(args, action):
   print(f"• Format: {colored(args.format, 'green')}")
   print(f"• Action: {colored(action, 'green')}")
 
-  # Check if type is empty
-  if type.__len__() == 0:
+  # Check if stages is empty
+  if stages.__len__() == 0:
     parser.error(f"{colored('[Error]', 'red')} You must specify a type with cron [s, b, d]")
 
-  # Check if all values are equal
-  if check_equal_values(type) == False:
-    print(f"{colored('[Error]', 'red')} The branch name must be the same for all types for this moment")
+  if confirm(f"{colored('Are you sure [Y/N]? ', 'light_blue', attrs=['bold'])}"):
+    create_pipeline(server, f"cron.{branch_name}", cron=args.format, stages=stages, slack_user_id=custom_config['SLACK']['UserId'])
+
+def cronPipeline(args):
+  """Cron several builds, deploys and starts in one pipeline, independent stages run in parallel"""
+  # Connect to jenkins
+  server = connect_to_jenkins(custom_config['JENKINS'])
+
+  for branch_name in args.build:
+    check_branch_name_not_empty(branch_name, branch_name)
+  builds = [get_branch_name(branch_name) for branch_name in args.build]
+  deploys = [get_branch_env(value) for value in args.deploy]
+  starts = [get_branch_env(value) for value in args.start]
+
+  # Check if stages is empty
+  if builds.__len__() + deploys.__len__() + starts.__len__() == 0:
+    parser.error(f"{colored('[Error]', 'red')} You must specify at least one of --build, --deploy or --start")
+
+  if croniter.is_valid(args.format) is False:
+    print(f"{colored('[Error]', 'red')} Cron is not valid")
     sys.exit(1)
 
-  if confirm(f"{colored('Are you sure [Y/N]? ', 'light_blue', attrs=['bold'])}"):
-    create_pipeline(server, f"cron.{list(type.values())[0]}",  env=env, cron=args.cron, type=type, slack_user_id=custom_config['SLACK']['UserId'])
+  stages = get_pipeline_stages(builds, deploys, starts)
+  name = args.name or '_'.join(dict.fromkeys(stage['branch'] for stage in stages))
 
+  print(f"{colored('[Cron Pipeline]', 'cyan')} {colored(name, 'green')}:")
+  for index, level in enumerate(get_stage_levels(get_stage_trees(stages))):
+    print(f"• Phase {index + 1}: {colored(' | '.join(tree['name'] for tree in level), 'green')}")
+  print(f"• Format: {colored(args.format, 'green')}")
+
+  if confirm(f"{colored('Are you sure [Y/N]? ', 'light_blue', attrs=['bold'])}"):
+    create_pipeline(server, f"cron.{name}", cron=args.format, stages=stages, slack_user_id=custom_config['SLACK']['UserId'])
 
 def cronStart(args):
   cron(args, 'start')
@@ -574,9 +861,7 @@ def get_assigned_mr(args):
   print(f"{colored('[Get Assigned MR]', 'cyan')}")
 
   try:
-    gl = gitlab.Gitlab(custom_config['GITLAB']['ServerUrl'], private_token=custom_config['GITLAB']['ApiKey'])
-
-    gl.auth()
+    gl = get_gitlab_server(custom_config['GITLAB']['ServerUrl'], custom_config['GITLAB']['ApiKey'])
 
     # Get merge requests that i'm a reviewer
     merge_requests = gl.mergerequests.list(reviewer_id=gl.user.id)
@@ -626,10 +911,6 @@ def ask_validation(args):
   #  askValidation(server, args.ask_validation, args.card_id, env,  env=env, slack_user_id=custom_config['SLACK']['UserId'])
 
 if __name__ == "__main__":
-  # Read config file
-  config_file_path = f"{pathlib.Path(__file__).parent.resolve()}/.jks-env"
-  custom_config = read_config_file(config_file_path)
-
   parser = argparse.ArgumentParser(
     prog='Saagie Jenkins',
     description='Use jenkins from command line',
@@ -637,6 +918,7 @@ if __name__ == "__main__":
 
   # Arguments
   parser.add_argument('-v', '--version', action='version', version='%(prog)s 2.3.3')
+  parser.add_argument('-P', '--profile', default=None, type=str, help='Config profile, comma-separated to target several servers with start and drop (default: $JKS_PROFILE or default)')
   subparsers = parser.add_subparsers(help='sub-command help')
 
   # create the parser for the "gke start" command
@@ -683,6 +965,14 @@ if __name__ == "__main__":
   parserCronBuild.add_argument('-f', '--format', required=True, nargs='?', type=str, help='Cron format')
   parserCronBuild.add_argument('-b', '--branch', default='current', const='current', nargs='?', type=str, help='Branch name')
   parserCronBuild.set_defaults(func=cronBuild)
+
+  parserCronPipeline = subparsersCron.add_parser('pipeline', help='cron pipeline --help')
+  parserCronPipeline.add_argument('-f', '--format', required=True, nargs='?', type=str, help='Cron format')
+  parserCronPipeline.add_argument('-n', '--name', default=None, type=str, help='Pipeline name (default: branch names)')
+  parserCronPipeline.add_argument('--build', default=[], action='append', type=str, help='Branch to build (repeatable)')
+  parserCronPipeline.add_argument('--deploy', default=[], action='append', type=str, help='Branch to deploy as branch:env (repeatable)')
+  parserCronPipeline.add_argument('--start', default=[], action='append', type=str, help='Branch to start as branch:env (repeatable)')
+  parserCronPipeline.set_defaults(func=cronPipeline)
   
   # create the parser for the "product build" command
   parserBuild = subparsers.add_parser('build', help='build --help')
@@ -714,6 +1004,15 @@ if __name__ == "__main__":
   parserBuildInfo.set_defaults(func=build_info)
 
   args = parser.parse_args()
+
+  # Read config file
+  config_file_path = f"{pathlib.Path(__file__).parent.resolve()}/.jks-env"
+  jks_config = read_config_file(config_file_path)
+
+  # Resolve selected profiles, the first one is used by single server commands
+  custom_configs = resolve_profiles(jks_config, args.profile, fan_out=getattr(args, 'func', None) in (start, drop))
+  custom_config = next(iter(custom_configs.values()))
+
   try:
     args.func(args)
   except KeyboardInterrupt: